@@ -1,5 +1,8 @@
 import typing
 import doctest
+import functools
+import itertools
+from collections import deque
 
 def dump(game):
     """
@@ -44,7 +47,22 @@ def new_game_2d(num_rows, num_cols, bombs):
     state: ongoing
     """
 
-    return new_game_nd((num_rows, num_cols), bombs)
+    board = [[0] * num_cols for _ in range(num_rows)]
+    for row, col in bombs:
+        board[row][col] = "."
+    for row, col in bombs:
+        for d_row, d_col in neighbor_offsets_nd(2):
+            r, c = row + d_row, col + d_col
+            if 0 <= r < num_rows and 0 <= c < num_cols and board[r][c] != ".":
+                board[r][c] += 1
+
+    return {
+        "dimensions": (num_rows, num_cols),
+        "board": board,
+        "hidden": [[True] * num_cols for _ in range(num_rows)],
+        "state": "ongoing",
+        "squares_left": num_rows * num_cols - len(bombs)
+    }
 
 
 def dig_2d(game, row, col):
@@ -111,7 +129,44 @@ def dig_2d(game, row, col):
     squares_left: 4
     state: defeat
     """
-    return dig_nd(game,(row,col))
+    if game["state"] == "defeat" or game["state"] == "victory": #if game over
+        return 0
+
+    board = game["board"]
+    hidden = game["hidden"]
+    num_rows, num_cols = game["dimensions"]
+
+    if not hidden[row][col]: #if already uncovered
+        return 0
+
+    hidden[row][col] = False #uncover square
+    revealed = 1
+    val = board[row][col]
+
+    if val == ".": #if uncover bomb
+        game["state"] = "defeat"
+        return revealed
+
+    stack = deque()
+    if val == 0: #if uncovered a 0
+        stack.append((row, col))
+
+    # same flood fill as dig_nd, with the 2-D neighbor bounds checks inlined
+    offsets = neighbor_offsets_nd(2)
+    while stack:
+        r, c = stack.pop()
+        for d_row, d_col in offsets:
+            n_r, n_c = r + d_row, c + d_col
+            if 0 <= n_r < num_rows and 0 <= n_c < num_cols and hidden[n_r][n_c]:
+                hidden[n_r][n_c] = False
+                revealed += 1
+                if board[n_r][n_c] == 0:
+                    stack.append((n_r, n_c))
+
+    game["squares_left"] = game["squares_left"] - revealed
+    if game["squares_left"] == 0:
+        game["state"] = "victory"
+    return revealed
 
 def render_2d_locations(game, xray=False):
     """
@@ -178,15 +233,7 @@ def render_2d_board(game, xray=False):
     ...                  'squares_left': 2})                 
     '.31_\\n__1_'
     """
-    string = ""
-    updated = render_2d_locations(game, xray)
-    for index, row in enumerate(updated):
-        for val in row:
-            string += val
-        if index != len(game["board"]) - 1:
-            string += "\n"
-    
-    return string
+    return "\n".join("".join(row) for row in render_2d_locations(game, xray))
 
 # N-D IMPLEMENTATION
 def create_game_0(dimensions, bombs):
@@ -194,26 +241,11 @@ def create_game_0(dimensions, bombs):
     Creates a game with all 0's everywhere except for at bomb locations given
     the dimensions of the board, and a list of bomb locations as tuples.
     """
-    board = []
-    hidden = []
+    board = make_board_nd(dimensions, 0)
+    hidden = make_board_nd(dimensions, True)
+    for bomb in bombs:
+        set_val(board, bomb, ".")
 
-    if len(dimensions) == 1:
-        board = [0] * dimensions[0]
-        hidden = [True] * dimensions[0]
-        for bomb in bombs:
-            board[bomb[0]] = "."
-    
-    else:
-        for i in range(dimensions[0]):
-            smaller_dim = dimensions[1:]
-            smaller_bombs = []
-            for bomb in bombs:
-                if bomb[0] == i:
-                    smaller_bombs.append(bomb[1:])
-            game = create_game_0(smaller_dim, smaller_bombs)
-            board.append(game["board"])
-            hidden.append(game["hidden"])
-    
     total = 1
     for dim in dimensions:
         total = total * dim
@@ -225,6 +257,15 @@ def create_game_0(dimensions, bombs):
         "squares_left": total-len(bombs)
     }
 
+def make_board_nd(dimensions, val):
+    """
+    Given the dimensions of a board, returns a nested N-d list with val at
+    every location.
+    """
+    if len(dimensions) == 1:
+        return [val] * dimensions[0]
+    return [make_board_nd(dimensions[1:], val) for _ in range(dimensions[0])]
+
 def new_game_nd(dimensions, bombs):
     """
     Start a new game.
@@ -266,46 +307,90 @@ def update_bombs_nd(board, bombs, dimensions):
     of nearby bombs. Changes the game board directly.
 
     """
+    get_neighbors = neighbor_function_nd(len(dimensions))
     for bomb in bombs:
-        neighbors = get_neighors_nd(dimensions, bomb)
-        for neighbor in neighbors:    
-            if neighbor not in bombs:
-                update_pos(board, neighbor, 1) #value at bomb coords
+        for neighbor in get_neighbors(dimensions, bomb):
+            row = board #innermost list holding neighbor
+            for index in neighbor[:-1]:
+                row = row[index]
+            if row[neighbor[-1]] != ".": #skip other bombs
+                row[neighbor[-1]] += 1
+
+@functools.lru_cache(maxsize=None)
+def neighbor_offsets_nd(ndim):
+    """
+    Given a number of dimensions, returns a tuple of the 3^ndim - 1 relative
+    offsets from a location to each of its neighbors.
+    """
+    return tuple(o for o in itertools.product((-1, 0, 1), repeat=ndim) if any(o))
 
 def get_neighors_nd(dimensions, location):
     """
-    Given the dimensions of a game, and a location on the board, returns a set
-    of tuples indicating the locations of location's neighbors.
-    """
-    neighbors = set()
-    if len(neighbors) == 0: #len(dimensions) == 1:
-        if location[0] >= 1:
-            neighbors.add((location[0]-1,))
-        if location[0] <= dimensions[0]-2:
-            neighbors.add((location[0]+1,))
-        neighbors.add((location[0],))
-        
-    for index in range(1, len(location)): 
-        new_neighbors = set()
-        for neighbor in neighbors:
-            if location[index] >= 1:
-                new_neighbors.add(neighbor + (location[index]-1,))
-            if location[index] <= dimensions[index]-2:
-                new_neighbors.add(neighbor + (location[index]+1,))
-            new_neighbors.add(neighbor + (location[index],))
-
-        neighbors = new_neighbors
+    Given the dimensions of a game, and a location on the board, returns a
+    list of tuples indicating the locations of location's neighbors (not
+    including location itself).
+
+    >>> get_neighors_nd((2, 3), (0, 2))
+    [(0, 1), (1, 1), (1, 2)]
+    >>> dims, loc = (1, 3, 3), (0, 0, 1)
+    >>> get_neighors_nd(dims, loc) == neighbor_function_nd(3)(dims, loc)
+    True
+    """
+    neighbors = [()]
+    for loc, dim in zip(location, dimensions): #drop out-of-range per dimension
+        coords = [c for c in (loc - 1, loc, loc + 1) if 0 <= c < dim]
+        neighbors = [neighbor + (c,) for neighbor in neighbors for c in coords]
+    neighbors.remove(tuple(location))
     return neighbors
 
+MAX_GENERATED_NDIM = 10
+
+@functools.lru_cache(maxsize=None)
+def neighbor_function_nd(ndim):
+    """
+    Given a number of dimensions, returns a function with the same behavior
+    as get_neighors_nd, generated with one nested loop per dimension.  Past
+    MAX_GENERATED_NDIM dimensions (kept well under Python's limit of 20
+    statically nested blocks) the function is get_neighors_nd itself.
+
+    >>> neighbor_function_nd(2)((2, 3), (0, 2))
+    [(0, 1), (1, 1), (1, 2)]
+    """
+    if ndim > MAX_GENERATED_NDIM:
+        return get_neighors_nd
+
+    names = range(ndim)
+    lines = [
+        "def neighbors(dimensions, location):",
+        f"    {', '.join(f'l{i}' for i in names)}, = location",
+        f"    {', '.join(f'd{i}' for i in names)}, = dimensions",
+        "    out = []",
+    ]
+    indent = "    "
+    for i in names:
+        lines.append(f"{indent}for o{i} in (-1, 0, 1):")
+        lines.append(f"{indent}    n{i} = l{i} + o{i}")
+        if i < ndim - 1:
+            lines.append(f"{indent}    if 0 <= n{i} < d{i}:")
+        else:
+            moved = " or ".join(f"o{j}" for j in names)
+            lines.append(f"{indent}    if 0 <= n{i} < d{i} and ({moved}):")
+        indent += "        "
+    lines.append(f"{indent}out.append(({', '.join(f'n{i}' for i in names)},))")
+    lines.append("    return out")
+
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["neighbors"]
+
 def update_pos(board, coords, val):
     """
     Given a game board as a nested N-d list, and coordinates coords in the 
     form of a tuple, adds val to the current value at coords.
     """
-    if len(coords) == 1:
-        board[coords[0]] += val
-    else:
-        update_pos(board[coords[0]], coords[1:], val)
+    for index in coords[:-1]:
+        board = board[index]
+    board[coords[-1]] += val
 
 def get_val(board, coords):
     """
@@ -313,10 +398,9 @@ def get_val(board, coords):
     at the coordinate.
 
     """
-    if len(coords) == 1:
-        return board[coords[0]]
-    else:
-        return get_val(board[coords[0]], coords[1:])
+    for index in coords[:-1]:
+        board = board[index]
+    return board[coords[-1]]
     
 def set_val(board, coords, val):
     """
@@ -324,16 +408,15 @@ def set_val(board, coords, val):
     at the coordinate to val.
 
     """
-    if len(coords) == 1:
-        board[coords[0]] = val
-    else:
-        set_val(board[coords[0]], coords[1:], val)
+    for index in coords[:-1]:
+        board = board[index]
+    board[coords[-1]] = val
 
 def dig_nd(game, coordinates):
     """
-    Recursively dig up square at coords and neighboring squares.
+    Dig up square at coords and neighboring squares.
 
-    Update the hidden to reveal square at coords; then recursively reveal its
+    Update the hidden to reveal square at coords; then iteratively reveal its
     neighbors, as long as coords does not contain and is not adjacent to a
     bomb.  Return a number indicating how many squares were revealed.  No
     action should be taken and 0 returned if the incoming state of the game
@@ -395,27 +478,42 @@ def dig_nd(game, coordinates):
     
     if game["state"] == "defeat" or game["state"] == "victory": #if game over
         return 0
-    if not get_val(game["hidden"], coordinates): #if already uncovered
+
+    board = game["board"]
+    hidden = game["hidden"]
+    dimensions = game["dimensions"]
+
+    if not get_val(hidden, coordinates): #if already uncovered
         return 0
-    
-    set_val(game["hidden"], coordinates, False) #uncover square
-    if get_val(game["board"], coordinates) != ".":
-        game["squares_left"] = game["squares_left"] - 1
+
+    set_val(hidden, coordinates, False) #uncover square
     revealed = 1
+    val = get_val(board, coordinates)
 
-    if get_val(game["board"], coordinates) == ".": #if uncover bomb
+    if val == ".": #if uncover bomb
         game["state"] = "defeat"
-        return 1
-
+        return revealed
+
+    stack = deque()
+    if val == 0: #if uncovered a 0
+        stack.append(coordinates)
+
+    # cells are uncovered as they are pushed, so each is visited at most once;
+    # neighbors of a 0 are never bombs
+    pop = stack.pop
+    push = stack.append
+    get_neighbors = neighbor_function_nd(len(dimensions))
+    while stack:
+        for neighbor in get_neighbors(dimensions, pop()):
+            if get_val(hidden, neighbor):
+                set_val(hidden, neighbor, False)
+                revealed += 1
+                if get_val(board, neighbor) == 0:
+                    push(neighbor)
+
+    game["squares_left"] = game["squares_left"] - revealed
     if game["squares_left"] == 0:
         game["state"] = "victory"
-        return 1
-    
-    if get_val(game["board"], coordinates) == 0: #if uncovered a 0
-        neighbors = get_neighors_nd(game["dimensions"], coordinates)
-        for neighbor in neighbors:
-            revealed += dig_nd(game, neighbor)
-
     return revealed
 
 def render_nd(game, xray=False):
@@ -452,28 +550,25 @@ def render_nd(game, xray=False):
     [[['3', '.'], ['3', '3'], ['1', '1'], [' ', ' ']],
      [['.', '3'], ['3', '.'], ['1', '1'], [' ', ' ']]]
     """
-    locations = []
-    if len(game["dimensions"]) == 1:
-        for coord in range(game["dimensions"][0]):
-            if get_val(game["hidden"], (coord,)) == True and not xray:
-                locations.append("_")
-            else:
-                if get_val(game["board"], (coord,)) == 0:
-                    locations.append(" ")
-                else:
-                    locations.append(str(get_val(game["board"], (coord,))))
-    else:
-        for index in range(game["dimensions"][0]):
-            new_game = {"dimensions": game["dimensions"][1:], 
-                        "board": game["board"][index],
-                        "hidden": game["hidden"][index], 
-                        "state": "ongoing"}
-            render = render_nd(new_game, xray)
-            locations.append(render)
-    return locations
+    return render_cells_nd(game["board"], game["hidden"],
+                           len(game["dimensions"]), xray)
+
+def render_cells_nd(board, hidden, ndim, xray):
+    """
+    Given an N-d board and hidden array (nested lists) with ndim dimensions,
+    returns the nested lists of strings to display, as in render_nd.
+    """
+    if ndim == 1:
+        return ["_" if is_hidden and not xray else " " if val == 0 else str(val)
+                for val, is_hidden in zip(board, hidden)]
+    return [render_cells_nd(sub_board, sub_hidden, ndim - 1, xray)
+            for sub_board, sub_hidden in zip(board, hidden)]
 
 
 if __name__ == "__main__":
+    _doctest_flags = doctest.NORMALIZE_WHITESPACE | doctest.ELLIPSIS
+    doctest.testmod(optionflags=_doctest_flags)
+
     #example usage
     # g = new_game_nd((3,), [(1,)])
     # print(g)